@@ -1,12 +1,26 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
 from fastapi.security import OAuth2PasswordRequestForm
 import database
 import models
 import auth
+import pubsub
+import json
 from datetime import timedelta
 
 router = APIRouter()
 
+# Idle SSE streams get a comment line this often so proxies keep them open.
+KEEPALIVE_SECONDS = 15
+
+def issue_tokens(email: str):
+    access_token_expires = timedelta(minutes=auth.ACCESS_TOKEN_EXPIRE_MINUTES)
+    access_token = auth.create_access_token(
+        data={"sub": email}, expires_delta=access_token_expires
+    )
+    refresh_token = auth.create_refresh_token(email)
+    return {"access_token": access_token, "refresh_token": refresh_token, "token_type": "bearer"}
+
 @router.post("/auth/signup", response_model=models.Token)
 async def signup(user: models.UserCreate):
     db_user = await database.get_user(user.email)
@@ -16,11 +30,7 @@ async def signup(user: models.UserCreate):
             detail="Email already registered",
         )
     new_user = await database.create_user(user)
-    access_token_expires = timedelta(minutes=auth.ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = auth.create_access_token(
-        data={"sub": new_user.email}, expires_delta=access_token_expires
-    )
-    return {"access_token": access_token, "token_type": "bearer"}
+    return issue_tokens(new_user.email)
 
 @router.post("/auth/login", response_model=models.Token)
 async def login(form_data: OAuth2PasswordRequestForm = Depends()):
@@ -31,11 +41,25 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends()):
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    access_token_expires = timedelta(minutes=auth.ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = auth.create_access_token(
-        data={"sub": user.email}, expires_delta=access_token_expires
-    )
-    return {"access_token": access_token, "token_type": "bearer"}
+    return issue_tokens(user.email)
+
+@router.post("/auth/refresh", response_model=models.Token)
+async def refresh(request: models.RefreshTokenRequest):
+    # Rotate: the presented refresh token is single use.
+    payload = auth.decode_refresh_token(request.refresh_token, consume=True)
+    user = await database.get_user(payload["sub"])
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate refresh token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return issue_tokens(user.email)
+
+@router.post("/auth/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(request: models.RefreshTokenRequest):
+    auth.decode_refresh_token(request.refresh_token, consume=True)
+    return
 
 @router.put("/profile", response_model=models.Profile)
 async def update_profile(
@@ -136,4 +160,27 @@ async def update_shopping_list_item(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Could not update item. Meal plan or item not found.",
         )
-    return updated_item
\ No newline at end of file
+    return updated_item
+
+@router.get("/shopping-list/price", response_model=models.PricedShoppingList)
+async def price_shopping_list(current_user: models.User = Depends(auth.get_current_user)):
+    priced = await database.price_shopping_list(current_user)
+    if not priced:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No meal plan found for the current week.",
+        )
+    return priced
+
+@router.get("/shopping-list/events")
+async def shopping_list_events(current_user: models.User = Depends(auth.get_current_user)):
+    channel = database.get_shopping_list_channel(current_user)
+
+    async def event_stream():
+        async for delta in pubsub.get_broker().subscribe(channel, idle_timeout=KEEPALIVE_SECONDS):
+            if delta is None:
+                yield ": keepalive\n\n"
+            else:
+                yield f"data: {json.dumps(delta)}\n\n"
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
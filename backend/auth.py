@@ -1,25 +1,38 @@
-from passlib.context import CryptContext
 from datetime import datetime, timedelta
-from jose import JWTError, jwt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from pydantic import BaseModel
-from typing import Optional
+from typing import Dict, Optional
+import time
+import uuid
 
 SECRET_KEY = "a_very_secret_key"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
+REFRESH_TOKEN_EXPIRE_DAYS = 14
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/v1/auth/login")
 
+# passlib/bcrypt and python-jose are imported on first use so they stay off
+# the cold-start import path.
+_pwd_context = None
+
+def get_pwd_context():
+    global _pwd_context
+    if _pwd_context is None:
+        from passlib.context import CryptContext
+        _pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+    return _pwd_context
+
 def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_pwd_context().verify(plain_password, hashed_password)
 
 def get_password_hash(password):
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
+    from jose import jwt
+
     to_encode = data.copy()
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
@@ -28,10 +41,77 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode.update({"exp": expire})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
+
+class TokenDenylist:
+    """Revoked refresh-token ids, held as 16-byte keys until the token expires.
+
+    The list is per process; entries are dropped once their token would have
+    expired anyway, so it only ever holds tokens that are still live.
+    """
+
+    def __init__(self, prune_every: int = 1024):
+        self._entries: Dict[bytes, int] = {}
+        self._prune_every = prune_every
+        self._adds = 0
+
+    def add(self, jti: str, exp: int):
+        self._entries[uuid.UUID(jti).bytes] = exp
+        self._adds += 1
+        if self._adds % self._prune_every == 0:
+            self.prune()
+
+    def prune(self):
+        now = time.time()
+        self._entries = {k: exp for k, exp in self._entries.items() if exp > now}
+
+    def __contains__(self, jti: str):
+        return uuid.UUID(jti).bytes in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+refresh_denylist = TokenDenylist()
+
+def create_refresh_token(email: str, expires_delta: Optional[timedelta] = None):
+    from jose import jwt
+
+    expire = datetime.utcnow() + (expires_delta or timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS))
+    to_encode = {"sub": email, "jti": uuid.uuid4().hex, "type": "refresh", "exp": expire}
+    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+
+def decode_refresh_token(token: str, consume: bool = False):
+    """Verify a refresh token's signature, expiry and revocation; no password hashing involved.
+
+    With ``consume`` the token is revoked in the same step as the denylist
+    check, before the caller can yield, so it can be redeemed only once.
+    """
+    from jose import JWTError, jwt
+
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate refresh token",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        if payload.get("type") != "refresh" or payload.get("sub") is None:
+            raise credentials_exception
+        if payload["jti"] in refresh_denylist:
+            raise credentials_exception
+        if consume:
+            revoke_refresh_token(payload)
+    except (JWTError, KeyError, ValueError):
+        raise credentials_exception
+    return payload
+
+def revoke_refresh_token(payload: dict):
+    refresh_denylist.add(payload["jti"], payload["exp"])
 from models import TokenData, User
 import database
 
 async def get_current_user(token: str = Depends(oauth2_scheme)):
+    from jose import JWTError, jwt
+
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -40,7 +120,7 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         email: str = payload.get("sub")
-        if email is None:
+        if email is None or payload.get("type") == "refresh":
             raise credentials_exception
         token_data = TokenData(email=email)
     except JWTError:
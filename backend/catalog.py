@@ -0,0 +1,304 @@
+"""Read-only binary snapshot of the meal catalog, shared across workers.
+
+The snapshot is built from the ``meals`` collection and written atomically.
+Every uvicorn worker memory-maps the same file read-only, so the catalog and
+its derived indexes (interned strings, tag bitmaps, parsed quantities) are
+shared zero-copy through the page cache instead of being copied per process.
+
+File layout (little endian, sections 8-byte aligned)::
+
+    header       magic, version, generation, section counts
+    strings      (n_strings + 1) uint32 offsets, then the UTF-8 blob
+    tags         n_tags uint32 string indices (bit i of a tag mask)
+    meals        n_meals records: ObjectId, name, portion, ingredient span, tag mask
+    ingredients  n_ingredients records: item, quantity, parsed amount, unit
+"""
+import asyncio
+import math
+import mmap
+import os
+import re
+import struct
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+from bson import ObjectId
+
+MAGIC = b"MPCS"
+VERSION = 1
+MAX_TAGS = 64
+
+HEADER = struct.Struct("<4sHHQIIII")
+MEAL = struct.Struct("<12sIIIIQ")
+INGREDIENT = struct.Struct("<IIfI")
+U32 = struct.Struct("<I")
+
+CATALOG_SNAPSHOT_PATH = os.getenv("CATALOG_SNAPSHOT_PATH")
+
+_QUANTITY_RE = re.compile(r"^\s*(\d+(?:\.\d+)?)(?:\s+(\d+)/(\d+)|/(\d+))?\s*(.*?)\s*$")
+
+
+def parse_quantity(quantity: str) -> Tuple[Optional[float], str]:
+    """Split a free-text quantity such as ``"1 1/2 cups"`` into (1.5, "cups").
+
+    Returns ``(None, quantity)`` when there is no leading number.
+    """
+    match = _QUANTITY_RE.match(quantity)
+    if not match:
+        return None, quantity.strip()
+    whole, num, den, frac_den, unit = match.groups()
+    amount = float(whole)
+    if num is not None and int(den):
+        amount += int(num) / int(den)
+    elif frac_den is not None and int(frac_den):
+        amount /= int(frac_den)
+    return amount, unit
+
+
+def _pad(buf: bytearray) -> None:
+    buf.extend(b"\0" * (-len(buf) % 8))
+
+
+def _read_generation(path: str) -> int:
+    try:
+        with open(path, "rb") as f:
+            raw = f.read(HEADER.size)
+    except FileNotFoundError:
+        return 0
+    if len(raw) < HEADER.size:
+        return 0
+    magic, version, _, generation, *_ = HEADER.unpack(raw)
+    if magic != MAGIC or version != VERSION:
+        return 0
+    return generation
+
+
+def encode_snapshot(meals: List[dict], generation: int) -> bytes:
+    strings: Dict[str, int] = {}
+
+    def intern(value: str) -> int:
+        index = strings.get(value)
+        if index is None:
+            index = strings[value] = len(strings)
+        return index
+
+    tag_bits: Dict[str, int] = {}
+    meal_records = []
+    ingredient_records = []
+    for meal in meals:
+        mask = 0
+        for tag in meal.get("dietaryTags", []):
+            if tag not in tag_bits:
+                if len(tag_bits) == MAX_TAGS:
+                    raise ValueError(f"Catalog has more than {MAX_TAGS} dietary tags")
+                tag_bits[tag] = len(tag_bits)
+                intern(tag)
+            mask |= 1 << tag_bits[tag]
+        start = len(ingredient_records)
+        for ingredient in meal.get("ingredients", []):
+            amount, unit = parse_quantity(ingredient["quantity"])
+            ingredient_records.append(INGREDIENT.pack(
+                intern(ingredient["item"]),
+                intern(ingredient["quantity"]),
+                math.nan if amount is None else amount,
+                intern(unit),
+            ))
+        meal_records.append(MEAL.pack(
+            ObjectId(meal["_id"]).binary,
+            intern(meal["name"]),
+            intern(meal.get("portionSize", "")),
+            start,
+            len(ingredient_records) - start,
+            mask,
+        ))
+
+    buf = bytearray(HEADER.pack(
+        MAGIC, VERSION, 0, generation,
+        len(meal_records), len(strings), len(tag_bits), len(ingredient_records),
+    ))
+    _pad(buf)
+    blob = bytearray()
+    offsets = []
+    for value in strings:
+        offsets.append(len(blob))
+        blob.extend(value.encode("utf-8"))
+    offsets.append(len(blob))
+    for offset in offsets:
+        buf.extend(U32.pack(offset))
+    buf.extend(blob)
+    _pad(buf)
+    for tag in tag_bits:
+        buf.extend(U32.pack(strings[tag]))
+    _pad(buf)
+    for record in meal_records:
+        buf.extend(record)
+    _pad(buf)
+    for record in ingredient_records:
+        buf.extend(record)
+    return bytes(buf)
+
+
+def write_snapshot(meals: List[dict], path: str) -> int:
+    """Atomically replace the snapshot at ``path``; returns the new generation.
+
+    Generations are seeded from the wall clock (microseconds) so a snapshot
+    rebuilt after the old file was deleted still gets a fresh number.
+    """
+    generation = max(_read_generation(path) + 1, time.time_ns() // 1000)
+    data = encode_snapshot(meals, generation)
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return generation
+
+
+class CatalogSnapshot:
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._file_id = (stat.st_ino, stat.st_mtime_ns)
+        view = memoryview(self._mm)
+
+        magic, version, _, self.generation, n_meals, n_strings, n_tags, n_ingredients = (
+            HEADER.unpack_from(view, 0)
+        )
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} catalog snapshot")
+
+        offset = HEADER.size + (-HEADER.size % 8)
+        self._string_offsets = view[offset:offset + 4 * (n_strings + 1)].cast("I")
+        offset += 4 * (n_strings + 1)
+        self._string_blob = offset
+        offset += self._string_offsets[n_strings] if n_strings else 0
+        offset += -offset % 8
+        tag_strings = view[offset:offset + 4 * n_tags].cast("I")
+        self.tags = [self.string(i) for i in tag_strings]
+        self._tag_bits = {tag: bit for bit, tag in enumerate(self.tags)}
+        offset += 4 * n_tags + (-4 * n_tags % 8)
+        self._meals = offset
+        self._n_meals = n_meals
+        offset += MEAL.size * n_meals + (-MEAL.size * n_meals % 8)
+        self._ingredients = offset
+        self._n_ingredients = n_ingredients
+        self._view = view
+        self._quantities: Optional[Dict[str, Tuple[Optional[float], str]]] = None
+
+    def __len__(self) -> int:
+        return self._n_meals
+
+    def string(self, index: int) -> str:
+        start = self._string_blob + self._string_offsets[index]
+        end = self._string_blob + self._string_offsets[index + 1]
+        return str(self._mm[start:end], "utf-8")
+
+    def tag_mask(self, tags: List[str]) -> Optional[int]:
+        """Bitmap for ``tags``; ``None`` if a tag is unknown so nothing can match."""
+        mask = 0
+        for tag in tags:
+            bit = self._tag_bits.get(tag)
+            if bit is None:
+                return None
+            mask |= 1 << bit
+        return mask
+
+    def matching(self, tags: List[str]) -> List[int]:
+        """Indices of meals carrying every tag in ``tags``."""
+        required = self.tag_mask(tags)
+        if required is None:
+            return []
+        return [
+            i for i in range(self._n_meals)
+            if MEAL.unpack_from(self._view, self._meals + i * MEAL.size)[5] & required == required
+        ]
+
+    def meal(self, index: int) -> dict:
+        """Decode one meal into the same shape as a ``meals`` document."""
+        oid, name, portion, start, count, mask = MEAL.unpack_from(
+            self._view, self._meals + index * MEAL.size
+        )
+        ingredients = []
+        for i in range(start, start + count):
+            item, quantity, _, _ = INGREDIENT.unpack_from(
+                self._view, self._ingredients + i * INGREDIENT.size
+            )
+            ingredients.append({"item": self.string(item), "quantity": self.string(quantity)})
+        return {
+            "_id": ObjectId(oid),
+            "name": self.string(name),
+            "portionSize": self.string(portion),
+            "ingredients": ingredients,
+            "dietaryTags": [tag for bit, tag in enumerate(self.tags) if mask >> bit & 1],
+        }
+
+    def parsed_quantities(self) -> Dict[str, Tuple[Optional[float], str]]:
+        """Quantity text -> (amount, unit), as parsed at build time.
+
+        Shopping-list quantities are built from these strings, so pricing can
+        look them up instead of re-parsing them on every request.
+        """
+        if self._quantities is None:
+            quantities = {}
+            for i in range(self._n_ingredients):
+                _, quantity, amount, unit = INGREDIENT.unpack_from(
+                    self._view, self._ingredients + i * INGREDIENT.size
+                )
+                quantities[self.string(quantity)] = (
+                    None if math.isnan(amount) else amount, self.string(unit)
+                )
+            self._quantities = quantities
+        return self._quantities
+
+    def find(self, tags: List[str], limit: Optional[int] = None) -> List[dict]:
+        return [self.meal(i) for i in self.matching(tags)[:limit]]
+
+    def is_stale(self) -> bool:
+        """True once the file at ``path`` has been swapped for a different generation."""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return False
+        if (stat.st_ino, stat.st_mtime_ns) == self._file_id:
+            return False
+        generation = _read_generation(self.path)
+        return generation != 0 and generation != self.generation
+
+
+_snapshot: Optional[CatalogSnapshot] = None
+
+
+def get_catalog() -> Optional[CatalogSnapshot]:
+    """The mapped snapshot for this worker, remapped when a new generation lands.
+
+    Returns ``None`` when no snapshot is configured or it has not been built yet.
+    """
+    global _snapshot
+    if not CATALOG_SNAPSHOT_PATH:
+        return None
+    if _snapshot is None or _snapshot.is_stale():
+        try:
+            fresh = CatalogSnapshot(CATALOG_SNAPSHOT_PATH)
+        except FileNotFoundError:
+            return _snapshot
+        # The old mapping is left to the garbage collector: meals already
+        # decoded from it are plain dicts and do not pin the memory map.
+        _snapshot = fresh
+    return _snapshot
+
+
+async def build_snapshot(path: str) -> int:
+    from storage import get_storage
+
+    meals = await get_storage().find_meals([])
+    return write_snapshot(meals, path)
+
+
+if __name__ == "__main__":
+    target = sys.argv[1] if len(sys.argv) > 1 else (CATALOG_SNAPSHOT_PATH or "catalog.snapshot")
+    generation = asyncio.run(build_snapshot(target))
+    print(f"Catalog snapshot generation {generation} written to {target}")
@@ -1,20 +1,24 @@
-import motor.motor_asyncio
 from models import User, UserCreate, MealPlan, Meal
 from auth import get_password_hash
-import os
 from datetime import datetime
 import random
 from bson import ObjectId
-
-MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017")
-client = motor.motor_asyncio.AsyncIOMotorClient(MONGO_URI)
-database = client.mealplanr
-user_collection = database.get_collection("users")
-meals_collection = database.get_collection("meals")
-meal_plan_collection = database.get_collection("meal_plans")
+import catalog
+from storage import get_storage
+import pubsub
+
+def shopping_list_channel(user_id, week: str):
+    """Pub/sub channel for a user's weekly list; stable across plan regeneration."""
+    return f"{user_id}:{week}"
+
+async def publish_shopping_list(user_id, week: str, shopping_list: list):
+    """Send the whole list, for changes that re-create every item id."""
+    await pubsub.get_broker().publish(
+        shopping_list_channel(user_id, week), {"op": "replace", "items": shopping_list}
+    )
 
 async def get_user(email: str):
-    user = await user_collection.find_one({"email": email})
+    user = await get_storage().find_user(email)
     if user:
         return User(**user)
 
@@ -23,15 +27,12 @@ async def create_user(user: UserCreate):
     user_dict = user.dict()
     user_dict.pop("password")
     user_dict["hashed_password"] = hashed_password
-    new_user = await user_collection.insert_one(user_dict)
-    created_user = await user_collection.find_one({"_id": new_user.inserted_id})
+    created_user = await get_storage().insert_user(user_dict)
     return User(**created_user)
 from models import Profile
 
 async def update_profile(email: str, profile: Profile):
-    await user_collection.update_one(
-        {"email": email}, {"$set": {"profile": profile.dict()}}
-    )
+    await get_storage().update_user(email, {"profile": profile.dict()})
     user = await get_user(email)
     return user.profile
 
@@ -41,13 +42,13 @@ async def generate_meal_plan(user: User):
     year = today.year
     week_str = f"{year}-W{week_number.week}"
 
-    await meal_plan_collection.delete_many({"userId": user.id, "week": week_str})
-
-    query = {}
-    if user.profile.dietaryRestrictions:
-        query["dietaryTags"] = {"$all": user.profile.dietaryRestrictions}
+    await get_storage().delete_meal_plans(user.id, week_str)
 
-    meals_list = await meals_collection.find(query).to_list(length=100)
+    snapshot = catalog.get_catalog()
+    if snapshot is not None:
+        meals_list = snapshot.find(user.profile.dietaryRestrictions, limit=100)
+    else:
+        meals_list = await get_storage().find_meals(user.profile.dietaryRestrictions, limit=100)
 
     if len(meals_list) < 3:
         return None
@@ -88,8 +89,8 @@ async def generate_meal_plan(user: User):
         "shoppingList": shopping_list
     }
 
-    result = await meal_plan_collection.insert_one(new_meal_plan_doc)
-    created_plan = await meal_plan_collection.find_one({"_id": result.inserted_id})
+    await get_storage().insert_meal_plan(new_meal_plan_doc)
+    await publish_shopping_list(user.id, week_str, shopping_list)
 
     return await get_meal_plan(user)
 
@@ -99,18 +100,18 @@ async def get_meal_plan(user: User):
     year = today.year
     week_str = f"{year}-W{week_number.week}"
     
-    plan_doc = await meal_plan_collection.find_one({"userId": user.id, "week": week_str})
+    plan_doc = await get_storage().find_meal_plan(user.id, week_str)
 
     if not plan_doc:
         return None
 
     for day_meal in plan_doc["meals"]:
         if day_meal.get("breakfast"):
-            day_meal["breakfast"] = await meals_collection.find_one({"_id": day_meal["breakfast"]})
+            day_meal["breakfast"] = await get_storage().find_meal(day_meal["breakfast"])
         if day_meal.get("lunch"):
-            day_meal["lunch"] = await meals_collection.find_one({"_id": day_meal["lunch"]})
+            day_meal["lunch"] = await get_storage().find_meal(day_meal["lunch"])
         if day_meal.get("dinner"):
-            day_meal["dinner"] = await meals_collection.find_one({"_id": day_meal["dinner"]})
+            day_meal["dinner"] = await get_storage().find_meal(day_meal["dinner"])
             
     return plan_doc
 
@@ -119,19 +120,15 @@ async def swap_meal(user: User, day: str, meal_type: str):
     if not plan:
         return None
 
-    query = {}
-    if user.profile.dietaryRestrictions:
-        query["dietaryTags"] = {"$all": user.profile.dietaryRestrictions}
-    
     current_meal_ids = []
     for meal_day in plan['meals']:
         if meal_day.get('breakfast'): current_meal_ids.append(meal_day['breakfast']['_id'])
         if meal_day.get('lunch'): current_meal_ids.append(meal_day['lunch']['_id'])
         if meal_day.get('dinner'): current_meal_ids.append(meal_day['dinner']['_id'])
 
-    query["_id"] = {"$nin": current_meal_ids}
-    
-    new_meal = await meals_collection.find_one(query)
+    new_meal = await get_storage().find_meal_excluding(
+        user.profile.dietaryRestrictions, current_meal_ids
+    )
     if not new_meal:
         return None # No other meals available to swap
 
@@ -161,16 +158,8 @@ async def swap_meal(user: User, day: str, meal_type: str):
     shopping_list = [{"id": str(ObjectId()), **v} for k, v in shopping_list_items.items()]
     
     # Update database
-    await meal_plan_collection.update_one(
-        {"_id": plan["_id"]},
-        {
-            "$set": {
-                f"meals.$[elem].{meal_type}": new_meal['_id'],
-                "shoppingList": shopping_list
-            }
-        },
-        array_filters=[{"elem.day": day}]
-    )
+    await get_storage().set_meal_slot(plan["_id"], day, meal_type, new_meal['_id'], shopping_list)
+    await publish_shopping_list(user.id, plan["week"], shopping_list)
 
     return await get_meal_plan(user)
 
@@ -205,20 +194,21 @@ async def remove_meal(user: User, day: str, meal_type: str):
     shopping_list = [{"id": str(ObjectId()), **v} for k, v in shopping_list_items.items()]
 
     # Update database
-    await meal_plan_collection.update_one(
-        {"_id": plan["_id"]},
-        {
-            "$set": {
-                f"meals.$[elem].{meal_type}": None,
-                "shoppingList": shopping_list
-            }
-        },
-        array_filters=[{"elem.day": day}]
-    )
+    await get_storage().set_meal_slot(plan["_id"], day, meal_type, None, shopping_list)
+    await publish_shopping_list(user.id, plan["week"], shopping_list)
 
     return await get_meal_plan(user)
 from models import ShoppingListItem, ShoppingListItemCreate
 
+def get_shopping_list_channel(user: User):
+    today = datetime.now()
+    week_number = today.isocalendar()
+    year = today.year
+    week_str = f"{year}-W{week_number.week}"
+
+    # No plan lookup: a device may subscribe before the week's plan exists.
+    return shopping_list_channel(user.id, week_str)
+
 async def add_shopping_list_item(user: User, item: ShoppingListItemCreate):
     today = datetime.now()
     week_number = today.isocalendar()
@@ -227,12 +217,12 @@ async def add_shopping_list_item(user: User, item: ShoppingListItemCreate):
     
     new_item = ShoppingListItem(**item.dict())
     
-    result = await meal_plan_collection.update_one(
-        {"userId": user.id, "week": week_str},
-        {"$push": {"shoppingList": new_item.dict()}}
-    )
+    plan_id = await get_storage().push_shopping_list_item(user.id, week_str, new_item.dict())
     
-    if result.modified_count == 1:
+    if plan_id:
+        await pubsub.get_broker().publish(
+            shopping_list_channel(user.id, week_str), {"op": "add", "item": new_item.dict()}
+        )
         return new_item
     return None
 
@@ -242,12 +232,14 @@ async def remove_shopping_list_item(user: User, item_id: str):
     year = today.year
     week_str = f"{year}-W{week_number.week}"
 
-    result = await meal_plan_collection.update_one(
-        {"userId": user.id, "week": week_str},
-        {"$pull": {"shoppingList": {"id": item_id}}}
-    )
+    plan_id = await get_storage().pull_shopping_list_item(user.id, week_str, item_id)
     
-    return result.modified_count == 1
+    if plan_id:
+        await pubsub.get_broker().publish(
+            shopping_list_channel(user.id, week_str), {"op": "remove", "id": item_id}
+        )
+        return True
+    return False
 
 async def update_shopping_list_item(user: User, item_id: str, checked: bool):
     today = datetime.now()
@@ -255,14 +247,31 @@ async def update_shopping_list_item(user: User, item_id: str, checked: bool):
     year = today.year
     week_str = f"{year}-W{week_number.week}"
 
-    result = await meal_plan_collection.update_one(
-        {"userId": user.id, "week": week_str, "shoppingList.id": item_id},
-        {"$set": {"shoppingList.$.checked": checked}}
+    updated = await get_storage().set_shopping_list_item_checked(
+        user.id, week_str, item_id, checked
     )
 
-    if result.modified_count == 1:
-        plan = await get_meal_plan(user)
-        for item in plan['shoppingList']:
-            if item['id'] == item_id:
-                return item
-    return None
\ No newline at end of file
+    if updated:
+        _, item = updated
+        await pubsub.get_broker().publish(
+            shopping_list_channel(user.id, week_str), {"op": "update", "item": item}
+        )
+        return item
+    return None
+
+async def price_shopping_list(user: User):
+    # numpy is only needed here, so keep it off the start-up import path.
+    import pricing
+
+    today = datetime.now()
+    week_number = today.isocalendar()
+    year = today.year
+    week_str = f"{year}-W{week_number.week}"
+
+    plan_doc = await get_storage().find_meal_plan(user.id, week_str)
+    if not plan_doc:
+        return None
+
+    return pricing.get_price_table().price_list(
+        plan_doc.get("shoppingList", []), budget=user.profile.weeklyBudget
+    )
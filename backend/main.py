@@ -1,11 +1,54 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from pymongo import MongoClient
-from pymongo.errors import ConnectionFailure
+import logging
 import os
 from api import router as api_router
+import auth
+import catalog
+import storage
 
-app = FastAPI()
+WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "").lower() in ("1", "true", "yes")
+
+logger = logging.getLogger(__name__)
+
+def _load_jwt():
+    import jose.jwt  # noqa: F401
+
+async def warm_up():
+    """Pay the deferred start-up costs before the first request instead of during it.
+
+    Warm-up is best effort: a failing step is logged and the service still
+    starts, leaving that cost to the first request that needs it.
+    """
+    steps = [
+        ("bcrypt backend", lambda: auth.get_pwd_context().handler("bcrypt").get_backend()),
+        ("jose", _load_jwt),
+        ("catalog snapshot", catalog.get_catalog),
+        ("OpenAPI schema", app.openapi),
+    ]
+    for name, step in steps:
+        try:
+            step()
+        except Exception:
+            logger.exception("Warm-up step %r failed", name)
+    try:
+        await asyncio.wait_for(storage.get_storage().ping(), timeout=5)
+        await asyncio.wait_for(storage.get_storage().ensure_indexes(), timeout=5)
+    except (ConnectionError, asyncio.TimeoutError) as e:
+        # A slow or unreachable database must not block the service from starting.
+        logger.warning("Warm-up could not reach the storage backend: %r", e)
+    except Exception:
+        logger.exception("Warm-up step 'storage ping' failed")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if WARMUP_ON_STARTUP:
+        await warm_up()
+    yield
+
+app = FastAPI(lifespan=lifespan)
 
 # CORS configuration
 origins = [
@@ -27,16 +70,10 @@ app.add_middleware(
 app.include_router(api_router, prefix="/api/v1")
 
 @app.get("/api/v1/healthz")
-def health_check():
+async def health_check():
     try:
-        # Assume MONGO_URI is set as an environment variable
-        mongo_uri = os.getenv("MONGO_URI")
-        if not mongo_uri:
-            raise HTTPException(status_code=500, detail="MONGO_URI environment variable not set")
-
-        client = MongoClient(mongo_uri, serverSelectionTimeoutMS=5000)
-        # The ismaster command is cheap and does not require auth.
-        client.admin.command('ismaster')
+        # Reuses the shared client instead of opening a new connection per probe.
+        await asyncio.wait_for(storage.get_storage().ping(), timeout=5)
         return {"status": "ok"}
-    except ConnectionFailure:
-        raise HTTPException(status_code=503, detail="MongoDB connection failed")
\ No newline at end of file
+    except (ConnectionError, asyncio.TimeoutError):
+        raise HTTPException(status_code=503, detail="Storage connection failed")
\ No newline at end of file
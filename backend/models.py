@@ -15,8 +15,8 @@ class PyObjectId(ObjectId):
         return ObjectId(v)
 
     @classmethod
-    def __get_pydantic_json_schema__(cls, field_schema):
-        field_schema.update(type="string")
+    def __get_pydantic_json_schema__(cls, core_schema, handler):
+        return {"type": "string"}
 
 class Profile(BaseModel):
     weeklyBudget: int = 50
@@ -44,6 +44,10 @@ class UserCreate(BaseModel):
 class Token(BaseModel):
     access_token: str
     token_type: str
+    refresh_token: Optional[str] = None
+
+class RefreshTokenRequest(BaseModel):
+    refresh_token: str
 
 class TokenData(BaseModel):
     email: Optional[str] = None
@@ -93,6 +97,13 @@ class ShoppingListItemCreate(BaseModel):
 class ShoppingListItemUpdate(BaseModel):
     checked: bool
 
+class PricedShoppingList(BaseModel):
+    items: List[ShoppingListItem]
+    total: float
+    unpricedCount: int = 0
+    weeklyBudget: Optional[float] = None
+    withinBudget: Optional[bool] = None
+
 class MealPlan(BaseModel):
     id: PyObjectId = Field(default_factory=PyObjectId, alias="_id")
     userId: PyObjectId
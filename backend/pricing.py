@@ -0,0 +1,167 @@
+"""Shopping-list pricing against a local per-store price table.
+
+The table is a CSV file with ``store,item,price,unit`` rows, where ``price``
+is per ``unit`` of the item (an empty unit means "each"). It is loaded into a
+stores x items matrix, so pricing a list, or a batch of lists, is a gather
+plus an ``argmin`` over the store axis.
+
+Quantities are looked up in the catalog snapshot's parsed quantities when
+one is mapped, falling back to ``catalog.parse_quantity``. Aggregated quantities
+such as ``"1 cup + 1/2 cup"`` are summed. A part without a number, or in a
+different unit from the price table, counts as one unit.
+"""
+import csv
+import os
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+import catalog
+from catalog import parse_quantity
+
+PRICE_TABLE_PATH = os.getenv(
+    "PRICE_TABLE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "prices.csv")
+)
+
+
+def _normalize_item(name: str) -> str:
+    return " ".join(name.lower().split())
+
+
+def _normalize_unit(unit: str) -> str:
+    unit = unit.strip().lower()
+    return unit[:-1] if unit.endswith("s") and len(unit) > 1 else unit
+
+
+class PriceTable:
+    def __init__(self, stores: List[str], items: List[str], units: List[str], prices: np.ndarray):
+        self.stores = stores
+        self.units = units
+        self._item_index: Dict[str, int] = {_normalize_item(item): i for i, item in enumerate(items)}
+        # A trailing all-inf column gives unknown items (index -1) no store.
+        self._prices = np.full((len(stores), len(items) + 1), np.inf)
+        self._prices[:, :len(items)] = prices
+
+    @classmethod
+    def load(cls, path: str = PRICE_TABLE_PATH) -> "PriceTable":
+        stores: Dict[str, int] = {}
+        items: Dict[str, int] = {}
+        names: List[str] = []
+        units: List[str] = []
+        rows = []
+        with open(path, newline="") as f:
+            for row in csv.DictReader(f):
+                store = row["store"].strip()
+                key = _normalize_item(row["item"])
+                unit = _normalize_unit(row.get("unit") or "")
+                if key not in items:
+                    items[key] = len(names)
+                    names.append(row["item"].strip())
+                    units.append(unit)
+                elif units[items[key]] != unit:
+                    raise ValueError(
+                        f"{path}: {row['item']!r} is priced per {unit!r} and per {units[items[key]]!r}"
+                    )
+                rows.append((stores.setdefault(store, len(stores)), items[key], float(row["price"])))
+
+        prices = np.full((len(stores), len(names)), np.inf)
+        for store, item, price in rows:
+            prices[store, item] = price
+        return cls(list(stores), names, units, prices)
+
+    def _amount(self, item: int, quantity: str, parsed: Dict[str, tuple]) -> float:
+        unit = self.units[item] if item >= 0 else ""
+        total = 0.0
+        for part in quantity.split("+"):
+            part = part.strip()
+            amount, part_unit = parsed.get(part) or parse_quantity(part)
+            if amount is None or _normalize_unit(part_unit) != unit:
+                amount = 1.0
+            total += amount
+        return total
+
+    def price_batch(self, shopping_lists: List[List[dict]]) -> List[dict]:
+        """Price several shopping lists at once.
+
+        Each result has ``items`` (copies with ``store`` and ``price`` set to
+        the cheapest store, or ``None`` if no store stocks the item), the
+        basket ``total`` of the priced items and ``unpricedCount``.
+        """
+        snapshot = catalog.get_catalog()
+        parsed = snapshot.parsed_quantities() if snapshot is not None else {}
+        width = max((len(items) for items in shopping_lists), default=0)
+        index = np.full((len(shopping_lists), width), -1, dtype=np.intp)
+        amounts = np.ones((len(shopping_lists), width))
+        for row, items in enumerate(shopping_lists):
+            for col, entry in enumerate(items):
+                item = self._item_index.get(_normalize_item(entry["item"]), -1)
+                index[row, col] = item
+                amounts[row, col] = self._amount(item, entry["quantity"], parsed)
+
+        # (stores, lists, items) cost of buying each item at each store.
+        costs = self._prices[:, index] * amounts
+        best_store = costs.argmin(axis=0)
+        # Round per item before summing so the item prices add up to the total.
+        best_cost = np.round(np.take_along_axis(costs, best_store[np.newaxis], axis=0)[0], 2)
+        priced = np.isfinite(best_cost)
+        totals = np.where(priced, best_cost, 0.0).sum(axis=1)
+        lengths = np.array([len(items) for items in shopping_lists], dtype=np.intp)
+        in_list = np.arange(width) < lengths[:, np.newaxis]
+        unpriced = (in_list & ~priced).sum(axis=1)
+
+        results = []
+        for row, items in enumerate(shopping_lists):
+            out = []
+            for col, entry in enumerate(items):
+                entry = dict(entry)
+                if priced[row, col]:
+                    entry["store"] = self.stores[best_store[row, col]]
+                    entry["price"] = float(best_cost[row, col])
+                else:
+                    entry["store"] = None
+                    entry["price"] = None
+                out.append(entry)
+            results.append({
+                "items": out,
+                "total": round(float(totals[row]), 2),
+                "unpricedCount": int(unpriced[row]),
+            })
+        return results
+
+    def price_list(self, shopping_list: List[dict], budget: Optional[float] = None) -> dict:
+        result = self.price_batch([shopping_list])[0]
+        result["weeklyBudget"] = budget
+        if result["unpricedCount"]:
+            # The true basket cost is unknown, so neither answer would be honest.
+            result["withinBudget"] = None
+        else:
+            result["withinBudget"] = budget is None or result["total"] <= budget
+        return result
+
+
+_price_table: Optional[PriceTable] = None
+
+
+def get_price_table() -> PriceTable:
+    global _price_table
+    if _price_table is None:
+        _price_table = PriceTable.load()
+    return _price_table
+
+
+if __name__ == "__main__":
+    # Micro-benchmark: one 30-item list across 20 stores.
+    rng = np.random.default_rng(0)
+    n_stores, n_items = 20, 30
+    names = [f"item {i}" for i in range(n_items)]
+    table = PriceTable(
+        [f"store {s}" for s in range(n_stores)], names, ["cup"] * n_items,
+        rng.uniform(0.5, 5.0, (n_stores, n_items)),
+    )
+    shopping_list = [{"item": name, "quantity": "1 cup + 1/2 cup"} for name in names]
+    runs = 2000
+    start = time.perf_counter()
+    for _ in range(runs):
+        table.price_list(shopping_list, budget=50)
+    print(f"{(time.perf_counter() - start) / runs * 1e6:.1f} us per {n_items}-item list across {n_stores} stores")
@@ -0,0 +1,70 @@
+import asyncio
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from typing import AsyncIterator, Dict, Optional, Set
+
+# Sent in place of the deltas a slow subscriber missed; the client should
+# re-fetch the list.
+RESYNC = {"op": "resync"}
+
+
+class PubSub(ABC):
+    """Interface for pushing shopping-list deltas to subscribed clients.
+
+    A channel is a user's list for one week (``database.shopping_list_channel``),
+    so it survives plan regeneration. Multi-worker deployments can swap in a
+    broker-backed implementation with ``set_broker``.
+    """
+
+    @abstractmethod
+    async def publish(self, channel: str, message: dict) -> None:
+        ...
+
+    @abstractmethod
+    def subscribe(self, channel: str, idle_timeout: Optional[float] = None) -> AsyncIterator[Optional[dict]]:
+        """Yield messages for ``channel``; yields ``None`` after ``idle_timeout`` seconds without one."""
+
+
+class InMemoryPubSub(PubSub):
+    """Fan-out within a single process using one queue per subscriber."""
+
+    def __init__(self, max_queue_size: int = 100):
+        self.max_queue_size = max_queue_size
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = defaultdict(set)
+
+    async def publish(self, channel: str, message: dict) -> None:
+        for queue in list(self._subscribers.get(channel, ())):
+            if queue.full():
+                # Slow consumer: rather than block writers or silently lose a
+                # delta, replace its backlog with a resync marker.
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(RESYNC)
+                continue
+            queue.put_nowait(message)
+
+    async def subscribe(self, channel: str, idle_timeout: Optional[float] = None) -> AsyncIterator[Optional[dict]]:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._subscribers[channel].add(queue)
+        try:
+            while True:
+                try:
+                    yield await asyncio.wait_for(queue.get(), timeout=idle_timeout)
+                except asyncio.TimeoutError:
+                    yield None
+        finally:
+            self._subscribers[channel].discard(queue)
+            if not self._subscribers[channel]:
+                del self._subscribers[channel]
+
+
+broker: PubSub = InMemoryPubSub()
+
+
+def get_broker() -> PubSub:
+    return broker
+
+
+def set_broker(new_broker: PubSub) -> None:
+    global broker
+    broker = new_broker
@@ -1,11 +1,7 @@
 import asyncio
-from motor.motor_asyncio import AsyncIOMotorClient
 from bson import ObjectId
 
 MONGO_DETAILS = "mongodb://localhost:27017"
-client = AsyncIOMotorClient(MONGO_DETAILS)
-database = client.mealplanr
-meals_collection = database.get_collection("meals")
 
 meals = [
     {
@@ -173,6 +169,13 @@ meals = [
 ]
 
 async def seed_data():
+    # The client is built here so that importing the sample meals (as the
+    # in-memory storage backend does) never touches motor or MongoDB.
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    client = AsyncIOMotorClient(MONGO_DETAILS)
+    meals_collection = client.mealplanr.get_collection("meals")
+    await client.mealplanr.get_collection("users").create_index("email", unique=True)
     await meals_collection.delete_many({})
     await meals_collection.insert_many(meals)
     print("Data seeded successfully")
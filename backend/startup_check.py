@@ -0,0 +1,87 @@
+"""Cold-start regression check, built on ``python -X importtime``.
+
+Imports ``main`` in fresh interpreters, reports the slowest top-level
+imports, and exits non-zero when the import takes longer than the budget or
+when a module that is supposed to load lazily shows up at start-up::
+
+    python startup_check.py --budget-ms 800 --runs 5
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+# Loaded on first use (see auth.get_pwd_context, storage.MongoStorage.client,
+# database.price_shopping_list).
+LAZY_MODULES = ["passlib", "bcrypt", "jose", "motor", "pymongo", "numpy"]
+
+_PROBE = (
+    "import sys, main; "
+    "print(','.join(m for m in {lazy!r} if m in sys.modules))"
+)
+
+
+def run_once(lazy_modules):
+    """Return (total_us, [(cumulative_us, name)] for main's direct imports, eager modules)."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _PROBE.format(lazy=lazy_modules)],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        sys.stderr.write(result.stderr)
+        raise SystemExit("import main failed")
+
+    # importtime prints in post-order: a module's imports precede it, indented
+    # two spaces per level. Collect the level-1 lines seen since the previous
+    # level-0 line, and keep them once that level-0 line turns out to be main.
+    children = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative_us, name = line[len("import time:"):].split("|")
+        if not cumulative_us.strip().isdigit():
+            continue  # column header
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 1:
+            children.append((int(cumulative_us), name.strip()))
+        elif depth == 0:
+            if name.strip() == "main":
+                eager = [m for m in result.stdout.strip().split(",") if m]
+                return int(cumulative_us), children, eager
+            children = []
+    raise SystemExit("no importtime entry for main")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--budget-ms", type=float, default=float(os.getenv("STARTUP_BUDGET_MS", 1000)))
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    best_us = None
+    best_children = []
+    eager = []
+    for _ in range(args.runs):
+        total_us, children, eager = run_once(LAZY_MODULES)
+        if best_us is None or total_us < best_us:
+            best_us, best_children = total_us, children
+
+    print(f"import main: {best_us / 1000:.1f} ms (best of {args.runs}, budget {args.budget_ms:.0f} ms)")
+    for us, name in sorted(best_children, reverse=True)[:args.top]:
+        print(f"  {us / 1000:8.1f} ms  {name}")
+
+    failed = False
+    if eager:
+        print(f"FAIL: imported at start-up but expected to be lazy: {', '.join(eager)}")
+        failed = True
+    if best_us / 1000 > args.budget_ms:
+        print("FAIL: start-up import time is over budget")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
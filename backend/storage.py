@@ -0,0 +1,358 @@
+"""Storage backends for users, meals and meal plans.
+
+``database.py`` holds the application logic and talks to the configured
+``Storage`` only. ``STORAGE_BACKEND`` selects the engine:
+
+- ``mongo`` (default): MongoDB through Motor, using ``MONGO_URI``.
+- ``memory``: process-local dictionaries with the same semantics, for
+  benchmarks, local development and single-node deployments.
+"""
+import copy
+import os
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Tuple
+
+from bson import ObjectId
+
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "mongo")
+MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017")
+
+
+class Storage(ABC):
+    """Documents go in and come out as plain dicts keyed like the Mongo collections."""
+
+    @abstractmethod
+    async def ping(self) -> None:
+        """Raise ``ConnectionError`` if the backend cannot be reached."""
+
+    @abstractmethod
+    async def ensure_indexes(self) -> None:
+        """Create the indexes the hot lookups rely on, e.g. unique ``users.email``."""
+
+    # users
+    @abstractmethod
+    async def find_user(self, email: str) -> Optional[dict]:
+        ...
+
+    @abstractmethod
+    async def insert_user(self, user: dict) -> dict:
+        ...
+
+    @abstractmethod
+    async def update_user(self, email: str, fields: dict) -> None:
+        ...
+
+    # meals
+    @abstractmethod
+    async def find_meals(self, tags: List[str], limit: Optional[int] = None) -> List[dict]:
+        """Meals carrying every tag in ``tags``."""
+
+    @abstractmethod
+    async def find_meal(self, meal_id: ObjectId) -> Optional[dict]:
+        ...
+
+    @abstractmethod
+    async def find_meal_excluding(self, tags: List[str], exclude_ids: List[ObjectId]) -> Optional[dict]:
+        ...
+
+    # meal plans
+    @abstractmethod
+    async def find_meal_plan(self, user_id: ObjectId, week: str) -> Optional[dict]:
+        ...
+
+    @abstractmethod
+    async def insert_meal_plan(self, plan: dict) -> ObjectId:
+        ...
+
+    @abstractmethod
+    async def delete_meal_plans(self, user_id: ObjectId, week: str) -> None:
+        ...
+
+    @abstractmethod
+    async def set_meal_slot(
+        self, plan_id: ObjectId, day: str, meal_type: str, meal_id: Optional[ObjectId], shopping_list: List[dict]
+    ) -> None:
+        ...
+
+    @abstractmethod
+    async def push_shopping_list_item(self, user_id: ObjectId, week: str, item: dict) -> Optional[ObjectId]:
+        """Append ``item``; returns the plan id, or ``None`` if there is no plan."""
+
+    @abstractmethod
+    async def pull_shopping_list_item(self, user_id: ObjectId, week: str, item_id: str) -> Optional[ObjectId]:
+        """Remove an item; returns the plan id, or ``None`` if plan or item is missing."""
+
+    @abstractmethod
+    async def set_shopping_list_item_checked(
+        self, user_id: ObjectId, week: str, item_id: str, checked: bool
+    ) -> Optional[Tuple[ObjectId, dict]]:
+        """Returns (plan id, updated item), or ``None`` if plan or item is missing."""
+
+
+class MongoStorage(Storage):
+    def __init__(self, uri: str = MONGO_URI):
+        self.uri = uri
+        self._client = None
+
+    @property
+    def client(self):
+        # Motor is imported and the client built on first use, keeping both
+        # off the cold-start import path.
+        if self._client is None:
+            import motor.motor_asyncio
+            self._client = motor.motor_asyncio.AsyncIOMotorClient(self.uri)
+        return self._client
+
+    @property
+    def users(self):
+        return self.client.mealplanr.get_collection("users")
+
+    @property
+    def meals(self):
+        return self.client.mealplanr.get_collection("meals")
+
+    @property
+    def meal_plans(self):
+        return self.client.mealplanr.get_collection("meal_plans")
+
+    async def ping(self):
+        from pymongo.errors import PyMongoError
+
+        try:
+            await self.client.admin.command("ping")
+        except PyMongoError as e:
+            raise ConnectionError(f"MongoDB ping failed: {e}") from e
+
+    async def ensure_indexes(self):
+        # find_user (login, refresh) is a lookup by email.
+        await self.users.create_index("email", unique=True)
+
+    async def find_user(self, email):
+        return await self.users.find_one({"email": email})
+
+    async def insert_user(self, user):
+        result = await self.users.insert_one(user)
+        return await self.users.find_one({"_id": result.inserted_id})
+
+    async def update_user(self, email, fields):
+        await self.users.update_one({"email": email}, {"$set": fields})
+
+    async def find_meals(self, tags, limit=None):
+        query = {}
+        if tags:
+            query["dietaryTags"] = {"$all": tags}
+        return await self.meals.find(query).to_list(length=limit)
+
+    async def find_meal(self, meal_id):
+        return await self.meals.find_one({"_id": meal_id})
+
+    async def find_meal_excluding(self, tags, exclude_ids):
+        query = {"_id": {"$nin": exclude_ids}}
+        if tags:
+            query["dietaryTags"] = {"$all": tags}
+        return await self.meals.find_one(query)
+
+    async def find_meal_plan(self, user_id, week):
+        return await self.meal_plans.find_one({"userId": user_id, "week": week})
+
+    async def insert_meal_plan(self, plan):
+        result = await self.meal_plans.insert_one(plan)
+        return result.inserted_id
+
+    async def delete_meal_plans(self, user_id, week):
+        await self.meal_plans.delete_many({"userId": user_id, "week": week})
+
+    async def set_meal_slot(self, plan_id, day, meal_type, meal_id, shopping_list):
+        await self.meal_plans.update_one(
+            {"_id": plan_id},
+            {
+                "$set": {
+                    f"meals.$[elem].{meal_type}": meal_id,
+                    "shoppingList": shopping_list
+                }
+            },
+            array_filters=[{"elem.day": day}]
+        )
+
+    async def push_shopping_list_item(self, user_id, week, item):
+        plan_doc = await self.meal_plans.find_one_and_update(
+            {"userId": user_id, "week": week},
+            {"$push": {"shoppingList": item}},
+            projection={"_id": 1},
+        )
+        return plan_doc["_id"] if plan_doc else None
+
+    async def pull_shopping_list_item(self, user_id, week, item_id):
+        plan_doc = await self.meal_plans.find_one_and_update(
+            {"userId": user_id, "week": week, "shoppingList.id": item_id},
+            {"$pull": {"shoppingList": {"id": item_id}}},
+            projection={"_id": 1},
+        )
+        return plan_doc["_id"] if plan_doc else None
+
+    async def set_shopping_list_item_checked(self, user_id, week, item_id, checked):
+        from pymongo import ReturnDocument
+
+        # Project only the matched item so a check-off never loads the plan.
+        plan_doc = await self.meal_plans.find_one_and_update(
+            {"userId": user_id, "week": week, "shoppingList.id": item_id},
+            {"$set": {"shoppingList.$.checked": checked}},
+            projection={"_id": 1, "shoppingList.$": 1},
+            return_document=ReturnDocument.AFTER,
+        )
+        if plan_doc and plan_doc.get("shoppingList"):
+            return plan_doc["_id"], plan_doc["shoppingList"][0]
+        return None
+
+
+class MemoryStorage(Storage):
+    """Dict-backed engine. Reads and writes copy documents, as a round trip to Mongo would."""
+
+    def __init__(self):
+        self.users: Dict[ObjectId, dict] = {}
+        self.meals: Dict[ObjectId, dict] = {}
+        self.meal_plans: Dict[ObjectId, dict] = {}
+        self._users_by_email: Dict[str, ObjectId] = {}
+        self._plans_by_user_week: Dict[Tuple[ObjectId, str], ObjectId] = {}
+
+    def insert_meals(self, meals: List[dict]) -> None:
+        """Load the meal catalog, e.g. from ``seed.meals``."""
+        for meal in meals:
+            meal = copy.deepcopy(meal)
+            meal.setdefault("_id", ObjectId())
+            self.meals[meal["_id"]] = meal
+
+    def _plan(self, user_id, week) -> Optional[dict]:
+        plan_id = self._plans_by_user_week.get((user_id, week))
+        return self.meal_plans.get(plan_id) if plan_id else None
+
+    async def ping(self):
+        return None
+
+    async def ensure_indexes(self):
+        # _users_by_email already indexes users by email.
+        return None
+
+    async def find_user(self, email):
+        user_id = self._users_by_email.get(email)
+        return copy.deepcopy(self.users[user_id]) if user_id else None
+
+    async def insert_user(self, user):
+        user = copy.deepcopy(user)
+        user.setdefault("_id", ObjectId())
+        self.users[user["_id"]] = user
+        self._users_by_email[user["email"]] = user["_id"]
+        return copy.deepcopy(user)
+
+    async def update_user(self, email, fields):
+        user_id = self._users_by_email.get(email)
+        if user_id:
+            self.users[user_id].update(copy.deepcopy(fields))
+
+    async def find_meals(self, tags, limit=None):
+        required = set(tags)
+        found = [
+            copy.deepcopy(meal) for meal in self.meals.values()
+            if required <= set(meal.get("dietaryTags", []))
+        ]
+        return found[:limit] if limit else found
+
+    async def find_meal(self, meal_id):
+        meal = self.meals.get(meal_id)
+        return copy.deepcopy(meal) if meal else None
+
+    async def find_meal_excluding(self, tags, exclude_ids):
+        required = set(tags)
+        excluded = set(exclude_ids)
+        for meal_id, meal in self.meals.items():
+            if meal_id not in excluded and required <= set(meal.get("dietaryTags", [])):
+                return copy.deepcopy(meal)
+        return None
+
+    async def find_meal_plan(self, user_id, week):
+        plan = self._plan(user_id, week)
+        return copy.deepcopy(plan) if plan else None
+
+    async def insert_meal_plan(self, plan):
+        plan = copy.deepcopy(plan)
+        plan.setdefault("_id", ObjectId())
+        self.meal_plans[plan["_id"]] = plan
+        self._plans_by_user_week[(plan["userId"], plan["week"])] = plan["_id"]
+        return plan["_id"]
+
+    async def delete_meal_plans(self, user_id, week):
+        plan_id = self._plans_by_user_week.pop((user_id, week), None)
+        if plan_id:
+            del self.meal_plans[plan_id]
+
+    async def set_meal_slot(self, plan_id, day, meal_type, meal_id, shopping_list):
+        plan = self.meal_plans.get(plan_id)
+        if not plan:
+            return
+        for meal_day in plan["meals"]:
+            if meal_day["day"] == day:
+                meal_day[meal_type] = meal_id
+        plan["shoppingList"] = copy.deepcopy(shopping_list)
+
+    async def push_shopping_list_item(self, user_id, week, item):
+        plan = self._plan(user_id, week)
+        if not plan:
+            return None
+        plan.setdefault("shoppingList", []).append(copy.deepcopy(item))
+        return plan["_id"]
+
+    async def pull_shopping_list_item(self, user_id, week, item_id):
+        plan = self._plan(user_id, week)
+        if not plan:
+            return None
+        remaining = [item for item in plan.get("shoppingList", []) if item["id"] != item_id]
+        if len(remaining) == len(plan.get("shoppingList", [])):
+            return None
+        plan["shoppingList"] = remaining
+        return plan["_id"]
+
+    async def set_shopping_list_item_checked(self, user_id, week, item_id, checked):
+        plan = self._plan(user_id, week)
+        if not plan:
+            return None
+        for item in plan.get("shoppingList", []):
+            if item["id"] == item_id:
+                item["checked"] = checked
+                return plan["_id"], copy.deepcopy(item)
+        return None
+
+
+_BACKENDS = {"mongo": MongoStorage, "memory": MemoryStorage}
+
+
+def _initial_meals() -> List[dict]:
+    import catalog
+
+    snapshot = catalog.get_catalog()
+    if snapshot is not None:
+        return [snapshot.meal(i) for i in range(len(snapshot))]
+    from seed import meals
+    return meals
+
+
+_storage: Optional[Storage] = None
+
+
+def get_storage() -> Storage:
+    global _storage
+    if _storage is None:
+        try:
+            backend = _BACKENDS[STORAGE_BACKEND]
+        except KeyError:
+            raise ValueError(
+                f"Unknown STORAGE_BACKEND {STORAGE_BACKEND!r}; expected one of {', '.join(_BACKENDS)}"
+            )
+        _storage = backend()
+        if isinstance(_storage, MemoryStorage):
+            _storage.insert_meals(_initial_meals())
+    return _storage
+
+
+def set_storage(storage: Storage) -> None:
+    global _storage
+    _storage = storage
@@ -0,0 +1,199 @@
+"""database.py shopping-list and meal-plan functions against MemoryStorage."""
+import asyncio
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+from bson import ObjectId
+
+import database
+import pubsub
+import seed
+from models import Profile, ShoppingListItemCreate
+from storage import MemoryStorage, set_storage
+
+
+def current_week():
+    today = datetime.now()
+    return f"{today.year}-W{today.isocalendar().week}"
+
+
+def make_user(tags=()):
+    # User(**doc) needs a password field the stored document does not carry,
+    # so the functions under test get a plain object with the same attributes.
+    return SimpleNamespace(
+        id=ObjectId(), email="cook@example.com", profile=Profile(dietaryRestrictions=list(tags))
+    )
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+async def collect(broker, channel, action):
+    """Run ``action`` while subscribed to ``channel``; returns the published messages."""
+    stream = broker.subscribe(channel, idle_timeout=0.05)
+    first = asyncio.ensure_future(stream.__anext__())
+    await asyncio.sleep(0)
+    await action()
+    messages = []
+    message = await first
+    while message is not None:
+        messages.append(message)
+        message = await stream.__anext__()
+    await stream.aclose()
+    return messages
+
+
+@pytest.fixture
+def store():
+    memory = MemoryStorage()
+    memory.insert_meals(seed.meals)
+    set_storage(memory)
+    yield memory
+    set_storage(None)
+
+
+@pytest.fixture
+def broker():
+    fresh = pubsub.InMemoryPubSub()
+    pubsub.set_broker(fresh)
+    return fresh
+
+
+@pytest.fixture
+def user():
+    return make_user()
+
+
+def insert_plan(store, user, meal_ids, shopping_list=None):
+    days = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+    meals = [{"day": day, "breakfast": None, "lunch": None, "dinner": None} for day in days]
+    for day_meal, meal_id in zip(meals, meal_ids):
+        day_meal["dinner"] = meal_id
+    plan = {
+        "userId": user.id,
+        "week": current_week(),
+        "meals": meals,
+        "shoppingList": shopping_list or [],
+    }
+    return run(store.insert_meal_plan(plan))
+
+
+def test_add_item_without_plan_returns_none(store, broker, user):
+    item = ShoppingListItemCreate(item="Milk", quantity="1 l")
+
+    async def action():
+        assert await database.add_shopping_list_item(user, item) is None
+
+    assert run(collect(broker, database.get_shopping_list_channel(user), action)) == []
+
+
+def test_add_item_appends_and_publishes(store, broker, user):
+    insert_plan(store, user, [])
+    created = []
+
+    async def action():
+        created.append(await database.add_shopping_list_item(
+            user, ShoppingListItemCreate(item="Milk", quantity="1 l")
+        ))
+
+    messages = run(collect(broker, database.get_shopping_list_channel(user), action))
+    new_item = created[0]
+    assert new_item.item == "Milk" and new_item.checked is False
+    assert messages == [{"op": "add", "item": new_item.dict()}]
+    plan = run(store.find_meal_plan(user.id, current_week()))
+    assert plan["shoppingList"] == [new_item.dict()]
+
+
+def test_remove_item(store, broker, user):
+    insert_plan(store, user, [], [{"id": "a", "item": "Milk", "quantity": "1 l", "checked": False}])
+    results = []
+
+    async def action():
+        results.append(await database.remove_shopping_list_item(user, "missing"))
+        results.append(await database.remove_shopping_list_item(user, "a"))
+
+    messages = run(collect(broker, database.get_shopping_list_channel(user), action))
+    assert results == [False, True]
+    assert messages == [{"op": "remove", "id": "a"}]
+    assert run(store.find_meal_plan(user.id, current_week()))["shoppingList"] == []
+
+
+def test_update_item(store, broker, user):
+    insert_plan(store, user, [], [{"id": "a", "item": "Milk", "quantity": "1 l", "checked": False}])
+    results = []
+
+    async def action():
+        results.append(await database.update_shopping_list_item(user, "missing", True))
+        results.append(await database.update_shopping_list_item(user, "a", True))
+
+    messages = run(collect(broker, database.get_shopping_list_channel(user), action))
+    missing, item = results
+    assert missing is None
+    assert item == {"id": "a", "item": "Milk", "quantity": "1 l", "checked": True}
+    assert messages == [{"op": "update", "item": item}]
+    assert run(store.find_meal_plan(user.id, current_week()))["shoppingList"] == [item]
+
+
+def test_swap_meal_excludes_planned_meals_and_respects_tags(store, broker):
+    user = make_user(["vegetarian"])
+    vegetarian = run(store.find_meals(["vegetarian"]))
+    assert len(vegetarian) >= 2
+    planned = vegetarian[0]["_id"]
+    insert_plan(store, user, [planned])
+    results = []
+
+    async def action():
+        results.append(await database.swap_meal(user, "Monday", "dinner"))
+
+    messages = run(collect(broker, database.get_shopping_list_channel(user), action))
+    swapped = results[0]["meals"][0]["dinner"]
+    assert swapped["_id"] != planned
+    assert "vegetarian" in swapped["dietaryTags"]
+    assert [message["op"] for message in messages] == ["replace"]
+    assert {item["item"] for item in messages[0]["items"]} == {
+        ingredient["item"] for ingredient in swapped["ingredients"]
+    }
+
+
+def test_swap_meal_without_alternative_returns_none(store, broker):
+    user = make_user(["no-such-tag"])
+    insert_plan(store, user, [])
+    assert run(database.swap_meal(user, "Monday", "dinner")) is None
+
+
+def test_remove_meal_clears_slot_and_publishes(store, broker, user):
+    meals = run(store.find_meals([], limit=2))
+    insert_plan(store, user, [meal["_id"] for meal in meals])
+    results = []
+
+    async def action():
+        results.append(await database.remove_meal(user, "Monday", "dinner"))
+
+    messages = run(collect(broker, database.get_shopping_list_channel(user), action))
+    plan = results[0]
+    assert plan["meals"][0]["dinner"] is None
+    assert plan["meals"][1]["dinner"]["_id"] == meals[1]["_id"]
+    assert messages == [{"op": "replace", "items": plan["shoppingList"]}]
+    assert {item["item"] for item in plan["shoppingList"]} == {
+        ingredient["item"] for ingredient in meals[1]["ingredients"]
+    }
+
+
+def test_find_meal_excluding_all_returns_none(store):
+    every_id = list(store.meals)
+    assert run(store.find_meal_excluding([], every_id)) is None
+    assert run(store.find_meal_excluding([], every_id[1:]))["_id"] == every_id[0]
+
+
+def test_documents_are_copied(store, user):
+    insert_plan(store, user, [])
+    plan = run(store.find_meal_plan(user.id, current_week()))
+    plan["shoppingList"].append({"id": "x"})
+    assert run(store.find_meal_plan(user.id, current_week()))["shoppingList"] == []
+
+    meal_id = next(iter(store.meals))
+    meal = run(store.find_meal(meal_id))
+    meal["ingredients"].clear()
+    assert run(store.find_meal(meal_id))["ingredients"]